@@ -0,0 +1,105 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import insert
+from sqlmodel import Session
+
+from .database import engine
+from .models import AuthAttempt
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL_SECONDS = 0.2
+FLUSH_BATCH_SIZE = 100
+STOP_TIMEOUT_SECONDS = 5.0
+
+_STOP = object()
+
+_queue: Optional[asyncio.Queue] = None
+_flusher: Optional[asyncio.Task] = None
+
+
+def enqueue(username: str | None, status: str, score: float | None, user_id: int | None) -> bool:
+    """
+    Buffers an attempt for the background flusher; must be called on the event loop.
+    Returns False when the flusher is not running so the caller can insert synchronously.
+    """
+    if _queue is None:
+        return False
+    _queue.put_nowait(
+        {
+            "username": username,
+            "status": status,
+            "score": score,
+            "user_id": user_id,
+            "created_at": datetime.utcnow(),
+        }
+    )
+    return True
+
+
+def _insert(rows: List[Dict[str, Any]]) -> None:
+    with Session(engine) as session:
+        session.execute(insert(AuthAttempt), rows)
+        session.commit()
+
+
+async def _write(rows: List[Dict[str, Any]]) -> None:
+    try:
+        await run_in_threadpool(_insert, rows)
+    except Exception:
+        # At-most-once: a failed batch is dropped rather than retried.
+        logger.exception("Dropped %d buffered auth attempts", len(rows))
+
+
+async def _flush_forever(queue: asyncio.Queue) -> None:
+    # Stopped by the _STOP sentinel rather than by cancellation, so a batch is never cut short.
+    while True:
+        first = await queue.get()
+        if first is _STOP:
+            return
+        rows = [first]
+        stopping = False
+        try:
+            async with asyncio.timeout(FLUSH_INTERVAL_SECONDS):
+                while len(rows) < FLUSH_BATCH_SIZE:
+                    row = await queue.get()
+                    if row is _STOP:
+                        stopping = True
+                        break
+                    rows.append(row)
+        except TimeoutError:
+            pass
+        await _write(rows)
+        if stopping:
+            return
+
+
+def start() -> None:
+    global _queue, _flusher
+    _queue = asyncio.Queue()
+    _flusher = asyncio.create_task(_flush_forever(_queue))
+
+
+async def stop() -> None:
+    global _queue, _flusher
+    if _flusher is None or _queue is None:
+        return
+    queue, flusher = _queue, _flusher
+    # From here on enqueue() returns False and callers insert synchronously.
+    _queue, _flusher = None, None
+    queue.put_nowait(_STOP)
+    done, _ = await asyncio.wait({flusher}, timeout=STOP_TIMEOUT_SECONDS)
+    if not done:
+        logger.warning("Attempt log flusher did not stop within %.1fs", STOP_TIMEOUT_SECONDS)
+        flusher.cancel()
+    rows = []
+    while not queue.empty():
+        row = queue.get_nowait()
+        if row is not _STOP:
+            rows.append(row)
+    if rows:
+        await _write(rows)
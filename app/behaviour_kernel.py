@@ -0,0 +1,70 @@
+from typing import Tuple
+
+import numpy as np
+from numba import njit
+
+
+@njit(cache=True)
+def _clamp(value: float) -> float:
+    return 0.0 if value < 0.0 else (100.0 if value > 100.0 else value)
+
+
+@njit(cache=True)
+def _timing_score(reference: np.ndarray, sample: np.ndarray) -> float:
+    # Average percentage difference |a-b| / a * 100, with each unmatched key counted as a 100% difference.
+    ref_len = reference.shape[0]
+    sample_len = sample.shape[0]
+    if ref_len == 0 or sample_len == 0:
+        return 0.0
+    min_len = min(ref_len, sample_len)
+    max_len = max(ref_len, sample_len)
+    total = 0.0
+    for i in range(min_len):
+        ref_val = reference[i]
+        denominator = ref_val if ref_val != 0.0 else 1e-6
+        total += abs(ref_val - sample[i]) / denominator * 100.0
+    total += 100.0 * (max_len - min_len)
+    return _clamp(100.0 - total / max_len)
+
+
+@njit(cache=True)
+def score_components(
+    stored_dwell: np.ndarray,
+    attempt_dwell: np.ndarray,
+    stored_flight: np.ndarray,
+    attempt_flight: np.ndarray,
+    stored_total: float,
+    attempt_total: float,
+    stored_speed: float,
+    stored_errors: float,
+    attempt_errors: float,
+) -> Tuple[float, float, float, float, float, float]:
+    """
+    Computes the dwell, flight, total time, speed, length and error scores in one call.
+    Every component is clamped to 0-100. stored_speed is the template's precomputed keys per second.
+    """
+    dwell = _timing_score(stored_dwell, attempt_dwell)
+    flight = _timing_score(stored_flight, attempt_flight)
+
+    denominator = stored_total if stored_total != 0.0 else 1e-6
+    total = _clamp(100.0 - abs(stored_total - attempt_total) / denominator * 100.0)
+
+    stored_len = stored_dwell.shape[0]
+    attempt_len = attempt_dwell.shape[0]
+    attempt_speed = max(attempt_len, 1) * 1000.0 / (attempt_total if attempt_total != 0.0 else 1e-6)
+    speed = _clamp(100.0 - abs(stored_speed - attempt_speed) / stored_speed * 100.0)
+
+    # Branchless: |a - b| <= max(a, b) keeps the length score within 0-100 without clamping, and for
+    # non-negative counts max(stored, 1) matches the old zero guard while equal counts still score 100.
+    length = 100.0 - abs(stored_len - attempt_len) / max(stored_len, attempt_len, 1) * 100.0
+    errors = 100.0 - min(abs(stored_errors - attempt_errors) / max(stored_errors, 1.0) * 100.0, 100.0)
+
+    return dwell, flight, total, speed, length, errors
+
+
+def warm_up() -> None:
+    # Trigger compilation at startup so the first login does not pay the JIT cost. Argument
+    # types match real calls: read-only float32 template views against float64 attempts.
+    stored = np.frombuffer(np.ones(2, dtype=np.float32).tobytes(), dtype=np.float32)
+    attempt = np.ones(2, dtype=np.float64)
+    score_components(stored, attempt, stored, attempt, 1.0, 1.0, 2000.0, 0.0, 0.0)
@@ -1,14 +1,34 @@
+import json
 from typing import Iterator
 
+from sqlalchemy import LargeBinary, bindparam, inspect, text
+from sqlalchemy.engine.url import make_url
 from sqlmodel import Session, SQLModel, create_engine
 
 from .config import settings
+from .models import AuthAttempt, BehaviourTemplate, pack_timings
 
-engine = create_engine(settings.normalized_db_url(), echo=False, pool_pre_ping=True)
+db_url = make_url(settings.normalized_db_url())
+connect_args = {}
+if db_url.drivername == "postgresql+psycopg":
+    # Prepare server-side on first use; login/dashboard repeat the same few statements.
+    connect_args["prepare_threshold"] = 0
+
+engine = create_engine(
+    db_url,
+    echo=False,
+    pool_pre_ping=True,
+    pool_size=10,
+    max_overflow=20,
+    query_cache_size=1200,
+    connect_args=connect_args,
+)
 
 
 def init_db() -> None:
     SQLModel.metadata.create_all(engine)
+    convert_json_timings()
+    sync_attempt_table_persistence()
 
 
 def get_session() -> Iterator[Session]:
@@ -22,3 +42,54 @@ def get_session() -> Iterator[Session]:
         raise
     finally:
         session.close()
+
+
+def sync_attempt_table_persistence() -> None:
+    """
+    Makes the Postgres auth attempt table match AUTH_ATTEMPTS_UNLOGGED in both directions.
+    The ALTER takes an ACCESS EXCLUSIVE lock, so it only runs when the persistence actually changes.
+    """
+    if engine.dialect.name != "postgresql":
+        return
+    table = AuthAttempt.__tablename__
+    with engine.begin() as connection:
+        persistence = connection.execute(
+            text("SELECT relpersistence FROM pg_class WHERE oid = to_regclass(:table)"),
+            {"table": table},
+        ).scalar()
+        if settings.auth_attempts_unlogged and persistence == "p":
+            connection.exec_driver_sql(f"ALTER TABLE {table} SET UNLOGGED")
+        elif not settings.auth_attempts_unlogged and persistence == "u":
+            connection.exec_driver_sql(f"ALTER TABLE {table} SET LOGGED")
+
+
+def convert_json_timings() -> None:
+    """
+    Rewrites Postgres templates enrolled with the old JSON timing columns as packed bytea, in place.
+    Runs once: afterwards both columns reflect as binary and this returns immediately.
+    """
+    if engine.dialect.name != "postgresql":
+        return
+    table = BehaviourTemplate.__tablename__
+    columns = {column["name"]: column["type"] for column in inspect(engine).get_columns(table)}
+    legacy = [name for name in ("dwell_times", "flight_times") if not isinstance(columns[name], LargeBinary)]
+    if not legacy:
+        return
+
+    with engine.begin() as connection:
+        rows = connection.execute(text(f"SELECT id, {', '.join(legacy)} FROM {table}")).all()
+        for name in legacy:
+            # Every row is rewritten below, so the cast only has to produce a placeholder.
+            connection.exec_driver_sql(f"ALTER TABLE {table} ALTER COLUMN {name} TYPE bytea USING ''::bytea")
+        update = text(
+            f"UPDATE {table} SET {', '.join(f'{name} = :{name}' for name in legacy)} WHERE id = :id"
+        ).bindparams(*(bindparam(name, type_=LargeBinary) for name in legacy))
+        for row in rows:
+            params = {"id": row.id}
+            for name in legacy:
+                values = getattr(row, name)
+                if isinstance(values, str):
+                    # Legacy text columns holding JSON come back unparsed.
+                    values = json.loads(values)
+                params[name] = pack_timings(values or [])
+            connection.execute(update, params)
@@ -1,39 +1,90 @@
-import json
+import asyncio
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from datetime import datetime
 from typing import Optional
 
-from fastapi import Depends, FastAPI, Form, HTTPException, Request, status
-from fastapi.responses import RedirectResponse
+import jinja2
+from fastapi import Depends, FastAPI, Form, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from sqlmodel import select
 from starlette.middleware.sessions import SessionMiddleware
 
-from . import behaviour
+from . import attempt_log, behaviour, behaviour_kernel
 from .auth import create_access_token, hash_password, verify_password
 from .config import settings
 from .database import get_session, init_db
-from sqlalchemy import func
+from sqlalchemy import bindparam, func
 
-from .models import AuthAttempt, BehaviourTemplate, User
+from .models import AuthAttempt, BehaviourTemplate, User, pack_timings
 from .schemas import BehaviourData
 
 app = FastAPI(title=settings.app_name)
 app.add_middleware(SessionMiddleware, secret_key=settings.secret_key)
 
 BASE_DIR = Path(__file__).resolve().parent
-templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
+TEMPLATES_DIR = str(BASE_DIR / "templates")
+STATIC_DIR = str(BASE_DIR / "static")
+# Templates never change at runtime: skip mtime checks and keep compiled bytecode across restarts.
+templates = Jinja2Templates(
+    env=jinja2.Environment(
+        loader=jinja2.FileSystemLoader(TEMPLATES_DIR),
+        autoescape=True,
+        auto_reload=False,
+        bytecode_cache=jinja2.FileSystemBytecodeCache(),
+    )
+)
+# Error-free login/register pages are identical for every signed-out visitor; rendered on startup.
+ANONYMOUS_PAGES: dict[str, str] = {}
 app.mount(
     "/static",
-    StaticFiles(directory=str(BASE_DIR / "static")),
+    StaticFiles(directory=STATIC_DIR),
     name="static",
 )
 
+# Statements are built once and bound per request, so SQLAlchemy reuses their compiled form.
+SELECT_USER_BY_ID = select(User).where(User.id == bindparam("user_id"))
+SELECT_USER_BY_NAME = select(User).where(User.username == bindparam("username"))
+SELECT_TEMPLATE_BY_USER = select(BehaviourTemplate).where(BehaviourTemplate.user_id == bindparam("user_id"))
+SELECT_ATTEMPT_COUNTS = (
+    select(AuthAttempt.status, func.count())
+    .where(AuthAttempt.user_id == bindparam("user_id"))
+    .group_by(AuthAttempt.status)
+)
+SELECT_RECENT_ATTEMPTS = (
+    select(AuthAttempt)
+    .where(AuthAttempt.user_id == bindparam("user_id"))
+    .order_by(AuthAttempt.created_at.desc())
+    .limit(10)
+)
+
 
 @app.on_event("startup")
 def on_startup() -> None:
     init_db()
+    behaviour_kernel.warm_up()
+    prerender_anonymous_pages()
+
+
+def prerender_anonymous_pages() -> None:
+    # The templates only read request.session, so an empty-session request stands in for any visitor.
+    anonymous = Request({"type": "http", "session": {}})
+    for name in ("login.html", "register.html"):
+        template = templates.get_template(name)
+        ANONYMOUS_PAGES[name] = template.render(request=anonymous, error=None, error_details=None)
+
+
+@app.on_event("startup")
+async def start_attempt_log() -> None:
+    attempt_log.start()
+
+
+@app.on_event("shutdown")
+async def stop_attempt_log() -> None:
+    await attempt_log.stop()
 
 
 def log_attempt(
@@ -43,6 +94,9 @@ def log_attempt(
     score: float | None,
     user_id: int | None = None,
 ) -> None:
+    # Successes are batched in the background; failures are written with the request so they are never delayed.
+    if status == "success" and attempt_log.enqueue(username, status, score, user_id):
+        return
     db.add(
         AuthAttempt(
             username=username,
@@ -57,9 +111,7 @@ def get_current_user(request: Request, session=Depends(get_session)) -> Optional
     user_id = request.session.get("user_id")
     if not user_id:
         return None
-    statement = select(User).where(User.id == user_id)
-    result = session.exec(statement).first()
-    return result
+    return session.scalar(SELECT_USER_BY_ID, params={"user_id": user_id})
 
 
 @app.get("/")
@@ -69,6 +121,8 @@ def root() -> RedirectResponse:
 
 @app.get("/register")
 def register_form(request: Request):
+    if not request.session.get("user_id") and "register.html" in ANONYMOUS_PAGES:
+        return HTMLResponse(ANONYMOUS_PAGES["register.html"])
     return templates.TemplateResponse("register.html", {"request": request, "error": None})
 
 
@@ -80,8 +134,7 @@ def register(
     behaviour_data: str = Form(...),
     session=Depends(get_session),
 ):
-    statement = select(User).where(User.username == username)
-    if session.exec(statement).first():
+    if session.scalar(SELECT_USER_BY_NAME, params={"username": username}):
         return templates.TemplateResponse(
             "register.html",
             {"request": request, "error": "Username already taken"},
@@ -89,7 +142,7 @@ def register(
         )
 
     try:
-        behaviour_parsed = BehaviourData.parse_raw(behaviour_data)
+        behaviour_parsed = BehaviourData.model_validate_json(behaviour_data)
     except Exception as exc:  # pragma: no cover - defensive
         return templates.TemplateResponse(
             "register.html",
@@ -103,8 +156,8 @@ def register(
 
     template = BehaviourTemplate(
         user_id=user.id,
-        dwell_times=behaviour_parsed.dwell_times,
-        flight_times=behaviour_parsed.flight_times,
+        dwell_times=pack_timings(behaviour_parsed.dwell_times),
+        flight_times=pack_timings(behaviour_parsed.flight_times),
         total_time=behaviour_parsed.total_time,
         error_count=behaviour_parsed.error_count,
     )
@@ -120,20 +173,62 @@ def register(
 
 @app.get("/login")
 def login_form(request: Request):
+    if not request.session.get("user_id") and "login.html" in ANONYMOUS_PAGES:
+        return HTMLResponse(ANONYMOUS_PAGES["login.html"])
     return templates.TemplateResponse("login.html", {"request": request, "error": None, "error_details": None})
 
 
+def load_user_by_name(session, username: str) -> Optional[User]:
+    return session.scalar(SELECT_USER_BY_NAME, params={"username": username})
+
+
+def load_template(session, user_id: int) -> Optional[BehaviourTemplate]:
+    return session.scalar(SELECT_TEMPLATE_BY_USER, params={"user_id": user_id})
+
+
+TEMPLATE_CACHE_SIZE = 4096
+_template_cache: OrderedDict[int, BehaviourTemplate] = OrderedDict()
+_template_cache_lock = threading.Lock()
+
+
+def cached_template(session, user_id: int) -> Optional[BehaviourTemplate]:
+    # Templates only change on enrollment, so repeat logins are served from memory.
+    with _template_cache_lock:
+        template = _template_cache.get(user_id)
+        if template is not None:
+            _template_cache.move_to_end(user_id)
+            return template
+    # Misses read through the request session (no second pooled connection) and are never cached.
+    template = load_template(session, user_id)
+    if template is None:
+        return None
+    # Detached, the instance (and its timing arrays) outlives the request session.
+    session.expunge(template)
+    with _template_cache_lock:
+        _template_cache[user_id] = template
+        if len(_template_cache) > TEMPLATE_CACHE_SIZE:
+            _template_cache.popitem(last=False)
+    return template
+
+
 @app.post("/login")
-def login(
+async def login(
     request: Request,
     username: str = Form(...),
     password: str = Form(...),
     behaviour_data: str = Form(...),
     session=Depends(get_session),
 ):
-    statement = select(User).where(User.username == username)
-    user = session.exec(statement).first()
-    if not user or not verify_password(password, user.hashed_password):
+    # Blocking work runs in the threadpool; the password hash check overlaps the template lookup.
+    user = await run_in_threadpool(load_user_by_name, session, username)
+    password_ok = False
+    stored_template = None
+    if user:
+        password_ok, stored_template = await asyncio.gather(
+            run_in_threadpool(verify_password, password, user.hashed_password),
+            run_in_threadpool(cached_template, session, user.id),
+        )
+    if not password_ok:
         log_attempt(session, username, "failure", None, user_id=user.id if user else None)
         return templates.TemplateResponse(
             "login.html",
@@ -141,8 +236,6 @@ def login(
             status_code=status.HTTP_401_UNAUTHORIZED,
         )
 
-    template_statement = select(BehaviourTemplate).where(BehaviourTemplate.user_id == user.id)
-    stored_template = session.exec(template_statement).first()
     if not stored_template:
         log_attempt(session, username, "failure", None, user_id=user.id)
         return templates.TemplateResponse(
@@ -156,7 +249,7 @@ def login(
         )
 
     try:
-        behaviour_parsed = BehaviourData.parse_raw(behaviour_data)
+        behaviour_parsed = BehaviourData.model_validate_json(behaviour_data)
     except Exception:
         log_attempt(session, username, "failure", None, user_id=user.id)
         return templates.TemplateResponse(
@@ -196,17 +289,10 @@ def dashboard(
     if not user:
         return RedirectResponse(url="/login", status_code=status.HTTP_302_FOUND)
 
-    success_count_raw = session.exec(
-        select(func.count()).select_from(AuthAttempt).where(AuthAttempt.user_id == user.id, AuthAttempt.status == "success")
-    ).one()
-    failure_count_raw = session.exec(
-        select(func.count()).select_from(AuthAttempt).where(AuthAttempt.user_id == user.id, AuthAttempt.status == "failure")
-    ).one()
-    success_count = success_count_raw[0] if isinstance(success_count_raw, tuple) else success_count_raw or 0
-    failure_count = failure_count_raw[0] if isinstance(failure_count_raw, tuple) else failure_count_raw or 0
-    recent_attempts = session.exec(
-        select(AuthAttempt).where(AuthAttempt.user_id == user.id).order_by(AuthAttempt.created_at.desc()).limit(10)
-    ).all()
+    status_counts = dict(session.exec(SELECT_ATTEMPT_COUNTS, params={"user_id": user.id}).all())
+    success_count = status_counts.get("success", 0)
+    failure_count = status_counts.get("failure", 0)
+    recent_attempts = session.exec(SELECT_RECENT_ATTEMPTS, params={"user_id": user.id}).all()
 
     return templates.TemplateResponse(
         "dashboard.html",
@@ -1,21 +1,49 @@
 from datetime import datetime
-from typing import List, Optional
+from functools import cached_property
+from typing import Optional, Sequence
 
-from sqlalchemy import JSON, Column, ForeignKey
+import numpy as np
+from sqlalchemy import Column, ForeignKey, Index, LargeBinary, event
 from sqlmodel import Field, Relationship, SQLModel
 
+# float32 is ample for 0-5000 ms keystroke timings and keeps stored templates small.
+TIMING_DTYPE = np.float32
+
+
+def pack_timings(values: Sequence[float]) -> bytes:
+    return np.asarray(values, dtype=TIMING_DTYPE).tobytes()
+
 
 class BehaviourTemplate(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id")
-    dwell_times: List[float] = Field(default_factory=list, sa_column=Column(JSON))
-    flight_times: List[float] = Field(default_factory=list, sa_column=Column(JSON))
+    # Packed TIMING_DTYPE values; build with pack_timings and read through dwell_arr/flight_arr.
+    dwell_times: bytes = Field(default=b"", sa_column=Column(LargeBinary, nullable=False))
+    flight_times: bytes = Field(default=b"", sa_column=Column(LargeBinary, nullable=False))
     total_time: float
     error_count: int = Field(default=0)
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
     user: Optional["User"] = Relationship(back_populates="behaviour_template")
 
+    # Zero-copy, read-only views over the stored bytes, built once per instance.
+    @cached_property
+    def dwell_arr(self) -> np.ndarray:
+        return np.frombuffer(self.dwell_times, dtype=TIMING_DTYPE)
+
+    @cached_property
+    def flight_arr(self) -> np.ndarray:
+        return np.frombuffer(self.flight_times, dtype=TIMING_DTYPE)
+
+    @cached_property
+    def stored_keys(self) -> int:
+        return len(self.dwell_arr) or 1
+
+    @cached_property
+    def stored_speed(self) -> float:
+        # Keys per second, with the same zero guards the scorer uses.
+        return self.stored_keys * 1000 / (self.total_time or 1e-6)
+
 
 class User(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
@@ -29,9 +57,28 @@ class User(SQLModel, table=True):
 
 
 class AuthAttempt(SQLModel, table=True):
+    # Serves the dashboard's per-user "latest attempts" and status counts; b-tree scans backwards for DESC.
+    __table_args__ = (Index("ix_authattempt_user_created", "user_id", "created_at"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: Optional[int] = Field(default=None, foreign_key="user.id")
     username: Optional[str] = Field(default=None, index=True)
     status: str
     score: Optional[float] = None
-    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+_TIMING_CACHE_ATTRS = ("dwell_arr", "flight_arr", "stored_keys", "stored_speed")
+
+
+def _reset_timing_cache(target: BehaviourTemplate, *_) -> None:
+    # Re-enrollment or a reload from the database must not reuse stale arrays.
+    for attr in _TIMING_CACHE_ATTRS:
+        target.__dict__.pop(attr, None)
+
+
+event.listen(BehaviourTemplate.dwell_times, "set", _reset_timing_cache)
+event.listen(BehaviourTemplate.flight_times, "set", _reset_timing_cache)
+event.listen(BehaviourTemplate.total_time, "set", _reset_timing_cache)
+event.listen(BehaviourTemplate, "expire", _reset_timing_cache)
+event.listen(BehaviourTemplate, "refresh", _reset_timing_cache)
@@ -1,24 +1,30 @@
-from typing import List, Optional
+from typing import List, Literal, Optional
 
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 
 class BehaviourData(BaseModel):
+    # JSON NaN/Infinity would otherwise reach the scoring kernel; reject them at the boundary.
+    model_config = ConfigDict(allow_inf_nan=False)
+
     dwell_times: List[float] = Field(default_factory=list)
     flight_times: List[float] = Field(default_factory=list)
     total_time: float
     error_count: int = 0
-    device_type: str = "fine"
+    device_type: Literal["fine", "coarse"] = "fine"
 
-    @validator("total_time")
+    @field_validator("total_time")
+    @classmethod
     def validate_total_time(cls, v: float) -> float:
         if v < 0:
             raise ValueError("total_time must be non-negative")
         return v
 
-    @validator("dwell_times", "flight_times", each_item=True)
-    def validate_timing_values(cls, v: float) -> float:
-        if v < 0:
+    @field_validator("dwell_times", "flight_times")
+    @classmethod
+    def validate_timing_values(cls, v: List[float]) -> List[float]:
+        # One check per vector rather than a validator call per element.
+        if min(v, default=0) < 0:
             raise ValueError("timing values must be non-negative")
         return v
 
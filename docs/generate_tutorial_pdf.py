@@ -1,6 +1,9 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import textwrap
+import zlib
+from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import Dict, List, Tuple
 
 PAGE_WIDTH = 595  # A4 points
@@ -11,20 +14,22 @@ TOP_MARGIN = 50
 BOTTOM_MARGIN = 50
 FOOTER_SPACE = 25
 
-FONT_NORMAL = "F1"
-FONT_BOLD = "F2"
-FONT_CODE = "F3"
+# Fonts are small ints that index _FONT_NAMES and _PREFIX.
+FONT_NORMAL, FONT_BOLD, FONT_CODE = 0, 1, 2
+_FONT_NAMES = ("F1", "F2", "F3")
+MAX_FONT_SIZE = 20
 
-@dataclass
+# Slotted: one Line is allocated per rendered line, so instances carry no __dict__.
+@dataclass(slots=True)
 class Line:
     text: str
-    font: str
+    font: int
     size: int
     x: int
     y: int
 
 
-@dataclass
+@dataclass(slots=True)
 class Block:
     kind: str
     text: str | List[str]
@@ -34,41 +39,93 @@ class Block:
     snippet_file: str | None = None
 
 
-def escape_pdf_text(text: str) -> str:
-    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+@dataclass
+class Layout:
+    pages: List[List[Line]] = field(default_factory=lambda: [[]])
+    snippet_pages: Dict[str, int] = field(default_factory=dict)
+    y: int = PAGE_HEIGHT - TOP_MARGIN
+    page_num: int = 1
+
+
+# Backslash and parentheses are the only characters that need escaping inside a PDF string literal.
+_ESCAPE_TABLE = str.maketrans({"\\": "\\\\", "(": "\\(", ")": "\\)"})
+
+
+# Code listings, bullets and footers repeat lines, so escaped results are memoized.
+@lru_cache(maxsize=1024)
+def escape_pdf_text(text: str) -> bytes:
+    return text.translate(_ESCAPE_TABLE).encode("ascii")
+
+
+# Each page is one BT/ET text object. A line starts with _PREFIX[font][size] (font selection plus the
+# start of the text matrix) when its font differs from the previous line, otherwise with _MATRIX.
+_MATRIX = b"1 0 0 1 "
+_PREFIX: List[List[bytes]] = [
+    [f"/{name} {size} Tf ".encode("ascii") + _MATRIX for size in range(MAX_FONT_SIZE + 1)]
+    for name in _FONT_NAMES
+]
+_TJ = b") Tj\n"
+
+
+@lru_cache(maxsize=None)
+def _text_wrapper(max_chars: int) -> textwrap.TextWrapper:
+    # One wrapper per width; break_on_hyphens=False selects TextWrapper's simpler word-split regex.
+    return textwrap.TextWrapper(
+        width=max_chars,
+        break_long_words=False,
+        break_on_hyphens=False,
+        expand_tabs=False,
+        replace_whitespace=False,
+    )
 
 
 def wrap_text(text: str, max_chars: int) -> List[str]:
-    words = text.split()
-    lines: List[str] = []
-    current: List[str] = []
-    for word in words:
-        if not current:
-            current.append(word)
-            continue
-        candidate = " ".join(current + [word])
-        if len(candidate) <= max_chars:
-            current.append(word)
-        else:
-            lines.append(" ".join(current))
-            current = [word]
-    if current:
-        lines.append(" ".join(current))
-    return lines
+    # Collapse whitespace runs up front, as the old split()-based wrapper did; the wrapper keeps them verbatim.
+    return _text_wrapper(max_chars).wrap(" ".join(text.split()))
 
 
-def max_chars_for_font(font_size: int, is_code: bool = False) -> int:
+def _estimate_max_chars(font_size: int, is_code: bool = False) -> int:
     # Conservative estimate of average character width.
     width = PAGE_WIDTH - LEFT_MARGIN - RIGHT_MARGIN
     factor = 0.6 if is_code else 0.55
     return max(20, int(width / (font_size * factor)))
 
 
-def layout_blocks(blocks: List[Block]) -> Tuple[List[List[Line]], Dict[str, int]]:
-    pages: List[List[Line]] = [[]]
-    snippet_pages: Dict[str, int] = {}
-    y = PAGE_HEIGHT - TOP_MARGIN
-    page_num = 1
+# Every size the layout uses, computed once at import instead of per block.
+MAX_CHARS: Dict[Tuple[int, bool], int] = {
+    (size, is_code): _estimate_max_chars(size, is_code)
+    for size in (9, 11, 12, 13, 16, 20)
+    for is_code in (False, True)
+}
+
+
+def max_chars_for_font(font_size: int, is_code: bool = False) -> int:
+    key = (font_size, is_code)
+    if key in MAX_CHARS:
+        return MAX_CHARS[key]
+    return _estimate_max_chars(font_size, is_code)
+
+
+# Font, size and spacing after the block for each block kind. Headings and paragraphs are laid
+# out from this table alone; bullets and code blocks add their own prefixes, indents and titles.
+_BLOCK_STYLES: Dict[str, Tuple[int, int, int]] = {
+    "h1": (FONT_BOLD, 20, 6),
+    "h2": (FONT_BOLD, 16, 4),
+    "h3": (FONT_BOLD, 13, 2),
+    "p": (FONT_NORMAL, 11, 4),
+    "bullets": (FONT_NORMAL, 11, 4),
+    "code": (FONT_CODE, 9, 6),
+}
+
+
+def layout_blocks(blocks: List[Block], layout: Layout | None = None) -> Layout:
+    # Passing a previous Layout continues from where it stopped instead of starting a new document.
+    if layout is None:
+        layout = Layout()
+    pages = layout.pages
+    snippet_pages = layout.snippet_pages
+    y = layout.y
+    page_num = layout.page_num
 
     def new_page() -> None:
         nonlocal y, page_num
@@ -76,53 +133,52 @@ def layout_blocks(blocks: List[Block]) -> Tuple[List[List[Line]], Dict[str, int]
         page_num += 1
         y = PAGE_HEIGHT - TOP_MARGIN
 
-    def add_line(text: str, font: str, size: int, indent: int = 0) -> None:
+    def add_lines(texts: List[str], font: int, size: int, indent: int = 0) -> None:
+        # Places as many lines as fit on the current page in one go, then continues on a new page.
         nonlocal y
         leading = size + 4
-        if y - leading < BOTTOM_MARGIN + FOOTER_SPACE:
-            new_page()
-        line = Line(text=text, font=font, size=size, x=LEFT_MARGIN + indent, y=y)
-        pages[-1].append(line)
-        y -= leading
+        x = LEFT_MARGIN + indent
+        start = 0
+        while start < len(texts):
+            capacity = max(0, (y - BOTTOM_MARGIN - FOOTER_SPACE) // leading)
+            if capacity == 0:
+                new_page()
+                continue
+            batch = texts[start : start + capacity]
+            pages[-1].extend(
+                Line(text=text, font=font, size=size, x=x, y=line_y)
+                for text, line_y in zip(batch, range(y, y - leading * len(batch), -leading))
+            )
+            y -= leading * len(batch)
+            start += len(batch)
 
     for block in blocks:
-        if block.kind == "h1":
-            for line in wrap_text(block.text, max_chars_for_font(20)):
-                add_line(line, FONT_BOLD, 20)
-            y -= 6
-        elif block.kind == "h2":
-            for line in wrap_text(block.text, max_chars_for_font(16)):
-                add_line(line, FONT_BOLD, 16)
-            y -= 4
-        elif block.kind == "h3":
-            for line in wrap_text(block.text, max_chars_for_font(13)):
-                add_line(line, FONT_BOLD, 13)
-            y -= 2
-        elif block.kind == "p":
-            lines = wrap_text(block.text, max_chars_for_font(11))
-            for line in lines:
-                add_line(line, FONT_NORMAL, 11)
-            y -= 4
-        elif block.kind == "bullets":
+        style = _BLOCK_STYLES.get(block.kind)
+        if style is None:
+            raise ValueError(f"Unknown block type: {block.kind}")
+        font, size, spacing = style
+        if block.kind == "bullets":
             for item in block.text:  # type: ignore[assignment]
-                bullet_lines = wrap_text(item, max_chars_for_font(11) - 4)
-                for i, line in enumerate(bullet_lines):
-                    prefix = "- " if i == 0 else "  "
-                    add_line(prefix + line, FONT_NORMAL, 11, indent=8)
-            y -= 4
+                bullet_lines = wrap_text(item, MAX_CHARS[(size, False)] - 4)
+                add_lines(
+                    [("- " if i == 0 else "  ") + line for i, line in enumerate(bullet_lines)],
+                    font,
+                    size,
+                    indent=8,
+                )
         elif block.kind == "code":
             if block.snippet_id and block.snippet_id not in snippet_pages:
                 snippet_pages[block.snippet_id] = page_num
             title = f"{block.snippet_title} ({block.snippet_file})"
-            for line in wrap_text(title, max_chars_for_font(12)):
-                add_line(line, FONT_BOLD, 12)
-            for line in block.text:  # type: ignore[assignment]
-                add_line(line, FONT_CODE, 9, indent=10)
-            y -= 6
+            add_lines(wrap_text(title, MAX_CHARS[(12, False)]), FONT_BOLD, 12)
+            add_lines(block.text, font, size, indent=10)  # type: ignore[arg-type]
         else:
-            raise ValueError(f"Unknown block type: {block.kind}")
+            add_lines(wrap_text(block.text, MAX_CHARS[(size, False)]), font, size)
+        y -= spacing
 
-    return pages, snippet_pages
+    layout.y = y
+    layout.page_num = page_num
+    return layout
 
 
 def build_blocks() -> List[Block]:
@@ -160,6 +216,7 @@ def build_blocks() -> List[Block]:
         "app/schemas.py: Pydantic models that validate behaviour data.",
         "app/auth.py: Password hashing and JWT creation.",
         "app/behaviour.py: Scoring logic for typing similarity.",
+        "app/behaviour_kernel.py: Numba-compiled component scores.",
         "app/utils.py: Helper math utilities.",
         "app/static/behaviour.js: Frontend capture of typing rhythm.",
         "app/templates/*.html: HTML pages for register, login, dashboard.",
@@ -198,7 +255,7 @@ def build_blocks() -> List[Block]:
     blocks.append(Block("p", "FastAPI injects the session into route handlers with Depends(get_session)."))
 
     blocks.append(Block("h2", "6) Data Models (app/models.py)"))
-    blocks.append(Block("p", "SQLModel classes become database tables. Each user has one behaviour template, and every login attempt is stored."))
+    blocks.append(Block("p", "SQLModel classes become database tables. Each user has one behaviour template, and every login attempt is stored. Dwell and flight times are stored as packed float32 bytes (built with pack_timings) and read back as NumPy arrays."))
     blocks.append(Block("code", [
         "class User(SQLModel, table=True):",
         "    id: Optional[int] = Field(default=None, primary_key=True)",
@@ -207,10 +264,14 @@ def build_blocks() -> List[Block]:
         "",
         "class BehaviourTemplate(SQLModel, table=True):",
         "    user_id: int = Field(foreign_key=\"user.id\")",
-        "    dwell_times: List[float] = Field(default_factory=list, sa_column=Column(JSON))",
-        "    flight_times: List[float] = Field(default_factory=list, sa_column=Column(JSON))",
+        "    dwell_times: bytes = Field(default=b\"\", sa_column=Column(LargeBinary, nullable=False))",
+        "    flight_times: bytes = Field(default=b\"\", sa_column=Column(LargeBinary, nullable=False))",
         "    total_time: float",
         "    error_count: int = Field(default=0)",
+        "",
+        "    @cached_property",
+        "    def dwell_arr(self) -> np.ndarray:",
+        "        return np.frombuffer(self.dwell_times, dtype=TIMING_DTYPE)",
     ], snippet_id="models", snippet_title="Snippet 4: User and BehaviourTemplate", snippet_file="app/models.py"))
 
     blocks.append(Block("h2", "7) Request Validation (app/schemas.py)"))
@@ -221,9 +282,10 @@ def build_blocks() -> List[Block]:
         "    flight_times: List[float] = Field(default_factory=list)",
         "    total_time: float",
         "    error_count: int = 0",
-        "    device_type: str = \"fine\"",
+        "    device_type: Literal[\"fine\", \"coarse\"] = \"fine\"",
         "",
-        "    @validator(\"total_time\")",
+        "    @field_validator(\"total_time\")",
+        "    @classmethod",
         "    def validate_total_time(cls, v: float) -> float:",
         "        if v < 0:",
         "            raise ValueError(\"total_time must be non-negative\")",
@@ -243,43 +305,39 @@ def build_blocks() -> List[Block]:
     ], snippet_id="auth", snippet_title="Snippet 6: Password hashing helpers", snippet_file="app/auth.py"))
 
     blocks.append(Block("h2", "9) Behaviour Scoring (app/behaviour.py)"))
-    blocks.append(Block("p", "The scoring function compares the stored template with the new attempt. It returns a score from 0 to 100 and checks a threshold."))
+    blocks.append(Block("p", "The scoring function compares the stored template with the new attempt. score_components returns the six component scores (dwell, flight, total, speed, length, error), and _combine weights them with the fine or coarse weight tuple into a score from 0 to 100."))
     blocks.append(Block("code", [
+        "_WEIGHTS_FINE = (0.26, 0.26, 0.14, 0.14, 0.1, 0.1)",
+        "_WEIGHTS_COARSE = (0.3, 0.3, 0.12, 0.08, 0.1, 0.1)",
+        "",
         "def similarity_score(stored: BehaviourTemplate, attempt: BehaviourData) -> tuple[float, dict]:",
-        "    dwell_component = dwell_score(stored, attempt)",
-        "    flight_component = flight_score(stored, attempt)",
-        "    total_component = total_time_score(stored, attempt)",
-        "    speed_component = speed_score(stored, attempt)",
-        "    error_component = error_score(stored, attempt)",
-        "    length_component = length_score(stored, attempt)",
-        "    combined = (",
-        "        weights[\"dwell\"] * dwell_component",
-        "        + weights[\"flight\"] * flight_component",
-        "        + weights[\"total\"] * total_component",
-        "        + weights[\"speed\"] * speed_component",
-        "        + weights[\"length\"] * length_component",
-        "        + weights[\"error\"] * error_component",
+        "    return _combine(",
+        "        _component_weights(attempt.device_type),",
+        "        *score_components(",
+        "            stored.dwell_arr, np.asarray(attempt.dwell_times, dtype=np.float64),",
+        "            stored.flight_arr, np.asarray(attempt.flight_times, dtype=np.float64),",
+        "            float(stored.total_time), float(attempt.total_time), stored.stored_speed,",
+        "            float(stored.error_count), float(attempt.error_count),",
+        "        ),",
         "    )",
-        "    score = round(clamp(combined), 2)",
-        "    return score, components",
     ], snippet_id="behaviour", snippet_title="Snippet 7: Similarity score", snippet_file="app/behaviour.py"))
     blocks.append(Block("p", "The is_behaviour_match function adds strong guards (key count and tempo) before accepting a score."))
 
-    blocks.append(Block("h2", "10) Utility Math (app/utils.py)"))
-    blocks.append(Block("p", "Two helpers handle clamping and average percentage difference between vectors."))
+    blocks.append(Block("h2", "10) Scoring Maths (app/behaviour_kernel.py)"))
+    blocks.append(Block("p", "The component scores are computed in a Numba-compiled kernel. Dwell and flight use the average percentage difference between the stored and attempted vectors, and every component is clamped to 0-100."))
     blocks.append(Block("code", [
-        "def clamp(value: float, minimum: float = 0.0, maximum: float = 100.0) -> float:",
-        "    return max(minimum, min(maximum, value))",
-        "",
-        "def average_percentage_difference(reference: List[float], sample: List[float]) -> float:",
-        "    if not reference or not sample:",
-        "        return 100.0",
-        "    diffs = []",
-        "    for ref_val, sample_val in zip(reference[:min_len], sample[:min_len]):",
-        "        denominator = ref_val if ref_val != 0 else 1e-6",
-        "        diffs.append(abs(ref_val - sample_val) / denominator * 100)",
-        "    return sum(diffs) / max_len if max_len else 100.0",
-    ], snippet_id="utils", snippet_title="Snippet 8: Clamp and average difference", snippet_file="app/utils.py"))
+        "@njit(cache=True)",
+        "def _timing_score(reference: np.ndarray, sample: np.ndarray) -> float:",
+        "    if ref_len == 0 or sample_len == 0:",
+        "        return 0.0",
+        "    total = 0.0",
+        "    for i in range(min_len):",
+        "        ref_val = reference[i]",
+        "        denominator = ref_val if ref_val != 0.0 else 1e-6",
+        "        total += abs(ref_val - sample[i]) / denominator * 100.0",
+        "    total += 100.0 * (max_len - min_len)",
+        "    return _clamp(100.0 - total / max_len)",
+    ], snippet_id="utils", snippet_title="Snippet 8: Timing difference score", snippet_file="app/behaviour_kernel.py"))
 
     blocks.append(Block("h2", "11) FastAPI Routes (app/main.py)"))
     blocks.append(Block("p", "The main file wires everything together: app startup, register, login, dashboard, and logout."))
@@ -296,10 +354,9 @@ def build_blocks() -> List[Block]:
     blocks.append(Block("code", [
         "@app.post(\"/register\")",
         "def register(...):",
-        "    statement = select(User).where(User.username == username)",
-        "    if session.exec(statement).first():",
+        "    if session.scalar(SELECT_USER_BY_NAME, params={\"username\": username}):",
         "        return error",
-        "    behaviour_parsed = BehaviourData.parse_raw(behaviour_data)",
+        "    behaviour_parsed = BehaviourData.model_validate_json(behaviour_data)",
         "    user = User(username=username, hashed_password=hash_password(password))",
         "    session.add(user)",
         "    session.flush()",
@@ -312,12 +369,16 @@ def build_blocks() -> List[Block]:
 
     blocks.append(Block("code", [
         "@app.post(\"/login\")",
-        "def login(...):",
-        "    user = session.exec(select(User).where(User.username == username)).first()",
-        "    if not user or not verify_password(password, user.hashed_password):",
+        "async def login(...):",
+        "    user = await run_in_threadpool(load_user_by_name, session, username)",
+        "    if user:",
+        "        password_ok, stored_template = await asyncio.gather(",
+        "            run_in_threadpool(verify_password, password, user.hashed_password),",
+        "            run_in_threadpool(cached_template, session, user.id),",
+        "        )",
+        "    if not password_ok:",
         "        return invalid credentials",
-        "    stored_template = session.exec(select(BehaviourTemplate).where(...)).first()",
-        "    behaviour_parsed = BehaviourData.parse_raw(behaviour_data)",
+        "    behaviour_parsed = BehaviourData.model_validate_json(behaviour_data)",
         "    is_match, score, reasons = behaviour.is_behaviour_match(stored_template, behaviour_parsed)",
         "    if not is_match:",
         "        return behaviour mismatch",
@@ -372,7 +433,7 @@ def build_blocks() -> List[Block]:
     blocks.append(Block("h2", "15) Common Beginner Questions"))
     blocks.append(Block("bullets", [
         "Why store timing vectors? They capture how you type, not just what you type.",
-        "Why JSON columns? Timing arrays fit naturally as JSON lists.",
+        "Why binary columns? Timing arrays are packed as float32 bytes, which are compact and load straight into NumPy arrays without parsing.",
         "What is behaviour_threshold? The minimum score required to accept a login.",
         "What happens on touch devices? The script switches to coarse capture.",
     ]))
@@ -396,7 +457,7 @@ def build_index(snippet_pages: Dict[str, int]) -> List[Block]:
         ("schemas", "Snippet 5: BehaviourData validation", "app/schemas.py"),
         ("auth", "Snippet 6: Password hashing helpers", "app/auth.py"),
         ("behaviour", "Snippet 7: Similarity score", "app/behaviour.py"),
-        ("utils", "Snippet 8: Clamp and average difference", "app/utils.py"),
+        ("utils", "Snippet 8: Timing difference score", "app/behaviour_kernel.py"),
         ("main_setup", "Snippet 9: App setup", "app/main.py"),
         ("register", "Snippet 10: Register flow", "app/main.py"),
         ("login", "Snippet 11: Login flow", "app/main.py"),
@@ -427,86 +488,89 @@ def build_pdf(pages: List[List[Line]], output_path: str) -> None:
     font1 = add_object("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
     font2 = add_object("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold >>")
     font3 = add_object("<< /Type /Font /Subtype /Type1 /BaseFont /Courier >>")
+    # Every page uses the same fonts, so they share one Resources object.
+    resources_obj = add_object(f"<< /Font << /F1 {font1} 0 R /F2 {font2} 0 R /F3 {font3} 0 R >> >>")
 
+    # Each page adds a content stream and a Page object, so the Pages object number is known up front.
+    pages_obj = len(objects) + 2 * len(pages) + 1
     page_objects: List[int] = []
     content_objects: List[int] = []
 
+    # One content buffer is reused for every page; zlib.compress copies out of it.
+    buf = bytearray()
     for idx, lines in enumerate(pages, start=1):
-        content_lines = []
+        buf.clear()
+        buf += b"BT\n"
+        current_font = None
         for line in lines:
-            text = escape_pdf_text(line.text)
-            content_lines.append(
-                f"BT /{line.font} {line.size} Tf 1 0 0 1 {line.x} {line.y} Tm ({text}) Tj ET"
-            )
-        # Footer with page number.
-        footer_text = escape_pdf_text(f"Page {idx}")
+            if (line.font, line.size) != current_font:
+                current_font = (line.font, line.size)
+                buf += _PREFIX[line.font][line.size]
+            else:
+                buf += _MATRIX
+            buf += f"{line.x} {line.y} Tm (".encode("ascii")
+            buf += escape_pdf_text(line.text)
+            buf += _TJ
+        # Footer with page number, inside the same text object.
         footer_x = PAGE_WIDTH // 2 - 20
         footer_y = BOTTOM_MARGIN - 10
-        content_lines.append(
-            f"BT /{FONT_NORMAL} 9 Tf 1 0 0 1 {footer_x} {footer_y} Tm ({footer_text}) Tj ET"
-        )
-        stream = "\n".join(content_lines)
-        stream_bytes = stream.encode("ascii")
+        buf += _PREFIX[FONT_NORMAL][9]
+        buf += f"{footer_x} {footer_y} Tm (".encode("ascii")
+        buf += escape_pdf_text(f"Page {idx}")
+        buf += _TJ
+        buf += b"ET"
+        # Operator text compresses very well; PDF 1.4 readers inflate FlateDecode natively.
+        stream_bytes = zlib.compress(buf)
         content_obj = add_object(
-            f"<< /Length {len(stream_bytes)} >>\nstream\n".encode("ascii")
+            f"<< /Length {len(stream_bytes)} /Filter /FlateDecode >>\nstream\n".encode("ascii")
             + stream_bytes
             + b"\nendstream"
         )
         content_objects.append(content_obj)
 
         page_obj = add_object(
-            f"<< /Type /Page /Parent 0 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
-            f"/Resources << /Font << /F1 {font1} 0 R /F2 {font2} 0 R /F3 {font3} 0 R >> >> "
+            f"<< /Type /Page /Parent {pages_obj} 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources {resources_obj} 0 R "
             f"/Contents {content_obj} 0 R >>"
         )
         page_objects.append(page_obj)
 
-    pages_obj = add_object(
+    add_object(
         "<< /Type /Pages /Kids ["
         + " ".join(f"{obj} 0 R" for obj in page_objects)
         + f"] /Count {len(page_objects)} >>"
     )
 
-    # Fix parent references now that pages object is known.
-    fixed_objects: List[bytes] = []
-    for i, obj in enumerate(objects, start=1):
-        if b"/Type /Page" in obj:
-            fixed_objects.append(obj.replace(b"/Parent 0 0 R", f"/Parent {pages_obj} 0 R".encode("ascii")))
-        else:
-            fixed_objects.append(obj)
-    objects = fixed_objects
-
     catalog_obj = add_object(f"<< /Type /Catalog /Pages {pages_obj} 0 R >>")
 
-    # Write PDF.
+    # Assemble the whole file in memory and write it once.
+    out = bytearray(b"%PDF-1.4\n")
     xref_offsets = []
+    for idx, obj in enumerate(objects, start=1):
+        xref_offsets.append(len(out))
+        out += b"%d 0 obj\n" % idx
+        out += obj
+        out += b"\nendobj\n"
+    xref_start = len(out)
+    out += b"xref\n0 %d\n" % (len(objects) + 1)
+    out += b"0000000000 65535 f \n"
+    for offset in xref_offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n"
+    out += b"<< /Size %d /Root %d 0 R >>\n" % (len(objects) + 1, catalog_obj)
+    out += b"startxref\n"
+    out += b"%d\n" % xref_start
+    out += b"%%EOF\n"
+
     with open(output_path, "wb") as f:
-        f.write(b"%PDF-1.4\n")
-        for idx, obj in enumerate(objects, start=1):
-            xref_offsets.append(f.tell())
-            f.write(f"{idx} 0 obj\n".encode("ascii"))
-            f.write(obj)
-            f.write(b"\nendobj\n")
-        xref_start = f.tell()
-        f.write(f"xref\n0 {len(objects) + 1}\n".encode("ascii"))
-        f.write(b"0000000000 65535 f \n")
-        for offset in xref_offsets:
-            f.write(f"{offset:010d} 00000 n \n".encode("ascii"))
-        f.write(b"trailer\n")
-        f.write(
-            f"<< /Size {len(objects) + 1} /Root {catalog_obj} 0 R >>\n".encode("ascii")
-        )
-        f.write(b"startxref\n")
-        f.write(f"{xref_start}\n".encode("ascii"))
-        f.write(b"%%EOF\n")
+        f.write(out)
 
 
 def main() -> None:
-    blocks = build_blocks()
-    pages, snippet_pages = layout_blocks(blocks)
-    index_blocks = build_index(snippet_pages)
-    final_pages, _ = layout_blocks(blocks + index_blocks)
-    build_pdf(final_pages, "docs/TypeShield_Tutorial.pdf")
+    # The index follows the content, so its page numbers are known once the content is laid out.
+    layout = layout_blocks(build_blocks())
+    layout = layout_blocks(build_index(layout.snippet_pages), layout)
+    build_pdf(layout.pages, "docs/TypeShield_Tutorial.pdf")
 
 
 if __name__ == "__main__":